@@ -10,11 +10,24 @@
 import logging
 import multiprocessing
 import signal
+import socket
+import threading
 
 # External dependencies.
 from humanfriendly import Timer, format_size
+from humanfriendly.decorators import cached
+from six.moves.urllib.error import URLError
 from six.moves.urllib.request import urlopen
-from stopit import SignalTimeout, TimeoutException
+from stopit import SignalTimeout, ThreadingTimeout, TimeoutException
+
+# Optional external dependency: When `requests' is installed it's used to
+# enable HTTP keep-alive (connection reuse), otherwise we gracefully fall
+# back to a fresh connection per request (using the standard library).
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
 
 # Initialize a logger for this module.
 logger = logging.getLogger(__name__)
@@ -41,7 +54,9 @@ def fetch_url(url, timeout=10, retry=False, max_attempts=3):
                that isn't 200.
              - `stopit.TimeoutException`_ when the request takes longer
                than `timeout` seconds (refer to the linked documentation for
-               details).
+               details). Socket level timeouts are normalized to this
+               exception type as well, so callers only need to handle one
+               kind of timeout.
              - Any exception raised by Python's standard library in the last
                attempt (assuming all attempts raise an exception).
 
@@ -49,27 +64,72 @@ def fetch_url(url, timeout=10, retry=False, max_attempts=3):
     """
     timer = Timer()
     logger.debug("Fetching %s ..", url)
+    # Signal based timeouts can only be used in the main thread, in other
+    # threads we fall back to the (more expensive) thread based timeouts.
+    try:
+        in_main_thread = threading.current_thread() is threading.main_thread()
+    except AttributeError:
+        # The threading.main_thread() function is only available in Python 3.4+.
+        in_main_thread = threading.current_thread().name == 'MainThread'
+    timeout_context = SignalTimeout if in_main_thread else ThreadingTimeout
+    session = get_session()
     for i in range(1, max_attempts + 1):
         try:
-            with SignalTimeout(timeout, swallow_exc=False):
-                response = urlopen(url)
-                status_code = response.getcode()
+            with timeout_context(timeout, swallow_exc=False):
+                # The socket level timeout bounds each individual network
+                # operation while the timeout context bounds the request
+                # as a whole.
+                if session is not None:
+                    response = session.get(url, timeout=timeout)
+                    status_code = response.status_code
+                    response_body = response.content
+                else:
+                    response = urlopen(url, timeout=timeout)
+                    status_code = response.getcode()
+                    response_body = response.read()
                 if status_code != 200:
                     exc_type = (NotFoundError if status_code == 404 else InvalidResponseError)
                     raise exc_type("URL returned unexpected status code %s! (%s)" % (status_code, url))
-                response_body = response.read()
                 logger.debug("Took %s to fetch %s.", timer, url)
                 return response_body
         except (NotFoundError, TimeoutException):
             # We never retry 404 responses and timeouts.
             raise
         except Exception as e:
+            if is_timeout_error(e):
+                # Normalize socket level timeouts so that callers only need
+                # to handle stopit.TimeoutException (we never retry timeouts).
+                raise TimeoutException("Request timed out! (%s)" % url)
             if retry and i < max_attempts:
                 logger.warning("Failed to fetch %s, retrying (%i/%i, error was: %s)", url, i, max_attempts, e)
             else:
                 raise
 
 
+@cached
+def get_session():
+    """
+    Get the HTTP session used by :func:`fetch_url()` (if any).
+
+    :returns: A :class:`requests.Session` object when the (optional)
+              `requests`_ package is installed, :data:`None` otherwise.
+
+    The session maintains a pool of keep-alive connections so that repeated
+    requests to the same mirror (and concurrent probes of many mirrors from
+    multiple threads) can reuse established TCP connections instead of paying
+    for a new handshake on every request. The session is safe to share
+    between threads for GET requests.
+
+    .. _requests: https://pypi.org/project/requests/
+    """
+    if requests is not None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+
 def fetch_concurrent(urls, concurrency=None):
     """
     Fetch the given URLs concurrently using :mod:`multiprocessing`.
@@ -93,6 +153,29 @@ def fetch_concurrent(urls, concurrency=None):
         raise
 
 
+def is_timeout_error(exception):
+    """
+    Check whether an exception indicates a socket level timeout.
+
+    :param exception: The exception to inspect (any object).
+    :returns: :data:`True` when the exception indicates a timeout,
+              :data:`False` otherwise.
+
+    This recognizes :exc:`socket.timeout` exceptions, also when they are
+    wrapped in a :exc:`~urllib.error.URLError` by :func:`urlopen()`, as well
+    as the timeout exceptions raised by the optional `requests` package, so
+    that :func:`fetch_url()` reports timeouts the same way regardless of
+    which of the two transports is being used.
+    """
+    if isinstance(exception, socket.timeout):
+        return True
+    if isinstance(exception, URLError) and isinstance(exception.reason, socket.timeout):
+        return True
+    if requests is not None and isinstance(exception, requests.exceptions.Timeout):
+        return True
+    return False
+
+
 def get_default_concurrency():
     """
     Get the default concurrency for :func:`fetch_concurrent()`.
@@ -47,7 +47,7 @@ import os
 
 # External dependencies.
 from executor import execute
-from humanfriendly.decorators import cached
+from humanfriendly.decorators import RESULTS_ATTRIBUTE, cached
 from property_manager import PropertyManager, key_property, lazy_property, required_property, writable_property
 from six import string_types
 
@@ -83,6 +83,9 @@ __all__ = (
 # Initialize a logger.
 logger = logging.getLogger(__name__)
 
+# Private dictionary used by coerce_release() to memoize its return values.
+_coercion_cache = {}
+
 
 def coerce_release(value):
     """
@@ -100,23 +103,39 @@ def coerce_release(value):
     .. warning:: Don't use floating point numbers like 10.04 because their
                  actual value will be something like 10.039999999999999147
                  which won't match the intended release.
+
+    .. note:: The return values of this function are memoized because callers
+              tend to coerce the same values over and over again (refer to
+              :func:`_invalidate()` when this is undesirable).
     """
     # Release objects pass through untouched.
     if isinstance(value, Release):
         return value
-    # Numbers and version strings are matched against release versions.
+    # Check if we've coerced the given value before.
+    try:
+        return _coercion_cache[value]
+    except KeyError:
+        pass
+    releases_by_version, releases_by_name = _release_index()
     if isinstance(value, numbers.Number) or is_version_string(value):
+        # Numbers and version strings are matched against release versions.
         typed_value = decimal.Decimal(value)
-        matches = [release for release in discover_releases() if release.version == typed_value]
+        matches = releases_by_version.get(typed_value, [])
         if len(matches) != 1:
             msg = "The number %s doesn't match a known Debian or Ubuntu release!"
             raise ValueError(msg % value)
-        return matches[0]
-    # Other strings are matched against release code names.
-    matches = [release for release in discover_releases() if value.lower() in release.codename.lower()]
-    if len(matches) != 1:
-        msg = "The string %r doesn't match a known Debian or Ubuntu release!"
-        raise ValueError(msg % value)
+    else:
+        # Other strings are matched against release code names. Exact matches
+        # on a code name or series are resolved with a dictionary lookup, only
+        # other input falls back to the substring scan over the full release
+        # table.
+        matches = releases_by_name.get(value.lower())
+        if matches is None:
+            matches = [release for release in discover_releases() if value.lower() in release.codename.lower()]
+        if len(matches) != 1:
+            msg = "The string %r doesn't match a known Debian or Ubuntu release!"
+            raise ValueError(msg % value)
+    _coercion_cache[value] = matches[0]
     return matches[0]
 
 
@@ -125,14 +144,14 @@ def discover_releases():
     """
     Discover known Debian, Elementary OS and Ubuntu releases.
 
-    :returns: A list of discovered :class:`Release` objects sorted by
+    :returns: A tuple of discovered :class:`Release` objects sorted by
              :attr:`~Release.distributor_id` and :attr:`~Release.version`.
 
     The first time this function is called it will try to parse the CSV files
     in ``/usr/share/distro-info`` using :func:`parse_csv_file()` and merge any
     releases it finds with the releases embedded into the source code of this
-    module and the releases defined by
-    :data:`apt_mirror_updater.backends.elementary.KNOWN_RELEASES`. The result
+    module and the releases reported by
+    :func:`apt_mirror_updater.backends.elementary.known_releases()`. The result
     is cached and returned each time the function is called. It's not a problem
     if the ``/usr/share/distro-info`` directory doesn't exist or doesn't
     contain any ``*.csv`` files (it won't cause a warning or error). Of course
@@ -153,9 +172,11 @@ def discover_releases():
     # Add the Elementary OS releases bundled with apt-mirror-updater.
     # We import the known releases here to avoid circular imports.
     from apt_mirror_updater.backends import elementary
-    result.update(elementary.KNOWN_RELEASES)
-    # Sort the releases by distributor ID and version / series.
-    return sorted(result, key=lambda r: (r.distributor_id, r.version or 0, r.series))
+    result.update(elementary.known_releases())
+    # Sort the releases by distributor ID and version / series. The result
+    # is a tuple because it's cached and handed out to any interested caller,
+    # so it should not be mutable.
+    return tuple(sorted(result, key=lambda r: (r.distributor_id, r.version or 0, r.series)))
 
 
 def is_version_string(value):
@@ -244,6 +265,49 @@ def ubuntu_keyring_updated():
     return updated
 
 
+@cached
+def _release_index():
+    """
+    Build indexes on the release table for :func:`coerce_release()`.
+
+    :returns: A tuple with two dictionaries:
+
+              1. A dictionary mapping release versions to lists of
+                 :class:`Release` objects.
+              2. A dictionary mapping lowercased code names and series to
+                 lists of :class:`Release` objects.
+
+    The values are lists because release versions and names aren't guaranteed
+    to be unique across distributors (for example Debian 5.0 and Elementary OS
+    5.0 share a version number) and :func:`coerce_release()` refuses to guess
+    on ambiguous input.
+    """
+    by_version = {}
+    by_name = {}
+    for release in discover_releases():
+        if release.version is not None:
+            by_version.setdefault(release.version, []).append(release)
+        for name in set([release.codename.lower(), release.series.lower()]):
+            by_name.setdefault(name, []).append(release)
+    return by_version, by_name
+
+
+def _invalidate():
+    """
+    Clear the memoized release metadata (intended for use by the test suite).
+
+    This clears the caches of :func:`coerce_release()`,
+    :func:`discover_releases()` and :func:`ubuntu_keyring_updated()` so that
+    the next call to each of these functions recomputes its return value.
+    """
+    _coercion_cache.clear()
+    for wrapper in discover_releases, ubuntu_keyring_updated, _release_index:
+        try:
+            delattr(wrapper, RESULTS_ATTRIBUTE)
+        except AttributeError:
+            pass
+
+
 class Release(PropertyManager):
 
     """Data class for metadata on Debian, Elementary OS and Ubuntu releases."""